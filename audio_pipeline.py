@@ -0,0 +1,660 @@
+import asyncio
+import hashlib
+import io
+import json
+import os
+import threading
+import weakref
+from concurrent.futures import Future
+from dotenv import load_dotenv
+import re
+import logging
+import tempfile
+from typing import Any, AsyncIterator, Awaitable, Callable, Coroutine, Dict, List, Optional, Tuple
+
+import ahocorasick
+import diskcache
+import httpx
+import soundfile
+import streamlit as st
+from openai import AsyncOpenAI, RateLimitError
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
+
+logger = logging.getLogger(__name__)
+
+
+@st.cache_resource(show_spinner=False)
+def get_background_loop() -> asyncio.AbstractEventLoop:
+    """
+    Event loop shared by every session, running in its own thread so pooled connections outlive reruns
+    """
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="openai-loop", daemon=True).start()
+    return loop
+
+
+# One client per event loop, kept out of st.cache_resource since it is only ever
+# resolved on the background loop thread, which has no Streamlit script context
+_clients = weakref.WeakKeyDictionary()
+
+
+def get_client() -> AsyncOpenAI:
+    """
+    OpenAI client with an HTTP/2 keep-alive pool, created lazily on the running loop
+    """
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        # Load environment variables
+        load_dotenv()
+        api_key = os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            raise ValueError("OPENAI_API_KEY topilmadi")
+
+        # Rate-limit retries are handled by _limited, outside the concurrency slot
+        client = _clients[loop] = AsyncOpenAI(
+            api_key=api_key,
+            max_retries=0,
+            http_client=httpx.AsyncClient(
+                http2=True,
+                limits=httpx.Limits(max_keepalive_connections=10)
+            )
+        )
+    return client
+
+
+def run_async(coro: Coroutine) -> Future:
+    """
+    Schedule a coroutine on the background loop and return its concurrent future
+    """
+    return asyncio.run_coroutine_threadsafe(coro, get_background_loop())
+
+
+# One semaphore per event loop: clearing the st.cache_resource cache starts a new
+# background loop, and a semaphore can't be shared across loops
+_semaphores = weakref.WeakKeyDictionary()
+
+
+def _openai_semaphore() -> asyncio.Semaphore:
+    """
+    Process-wide cap on in-flight OpenAI requests, shared by every session on the background loop
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        # Built from inside the loop: before Python 3.10 a semaphore binds to the
+        # loop that is current when it is created
+        load_dotenv()
+        semaphore = _semaphores[loop] = asyncio.Semaphore(int(os.getenv("OPENAI_MAX_CONCURRENCY", "8")))
+    return semaphore
+
+
+_retry_rate_limited = retry(
+    retry=retry_if_exception_type(RateLimitError),
+    wait=wait_exponential(multiplier=1, min=1, max=30),
+    stop=stop_after_attempt(6),
+    reraise=True
+)
+
+
+@_retry_rate_limited
+async def _limited(call: Callable[[], Awaitable[Any]]) -> Any:
+    """
+    Run one OpenAI request under the concurrency cap, backing off on rate limits
+    """
+    # The slot is released while waiting out a 429 so queued requests can use it
+    async with _openai_semaphore():
+        return await call()
+
+
+class LLMCache:
+    """
+    Disk-backed cache for deterministic chat completions
+    """
+
+    def __init__(self, directory: str = ".llm_cache"):
+        self._cache = diskcache.Cache(directory)
+
+    @staticmethod
+    def cache_key(model: str, messages: List[Dict[str, str]], temperature: float,
+                  response_format: Optional[Dict[str, str]] = None, seed: Optional[int] = None) -> Optional[str]:
+        """
+        Build a cache key, or None when sampling makes the response non-reproducible
+        """
+        if temperature > 0:
+            return None
+        payload = {"model": model, "messages": messages, "temperature": temperature,
+                   "response_format": response_format, "seed": seed}
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+    async def get_or_compute(self, key: Optional[str], compute: Callable[[], Awaitable[str]]) -> str:
+        """
+        Return the cached value for key, calling compute and storing its result on a miss
+        """
+        if key is not None:
+            cached = self._cache.get(key)
+            if cached is not None:
+                logger.info("LLM kesh topildi")
+                return cached
+
+        result = await compute()
+        if key is not None:
+            self._cache.set(key, result)
+        return result
+
+    async def stream_or_compute(self, key: Optional[str],
+                                stream: Callable[[], AsyncIterator[str]]) -> AsyncIterator[str]:
+        """
+        Yield the cached value for key in one piece, or relay stream and store the joined result
+        """
+        if key is not None:
+            cached = self._cache.get(key)
+            if cached is not None:
+                logger.info("LLM kesh topildi")
+                yield cached
+                return
+
+        chunks = []
+        async for chunk in stream():
+            chunks.append(chunk)
+            yield chunk
+        if key is not None:
+            self._cache.set(key, "".join(chunks))
+
+
+llm_cache = LLMCache()
+whisper_cache = diskcache.Cache(".whisper_cache")
+
+WHISPER_MODEL = "whisper-1"
+BATCH_CONCURRENCY = 5
+# Diarization and translation are near-mechanical text transforms, only the
+# summary needs the larger model
+MODEL_DIARIZE = "gpt-4o-mini"
+MODEL_TRANSLATE = "gpt-4o-mini"
+MODEL_COMBINED = "gpt-4o-mini"
+MODEL_SUMMARY = "gpt-4o"
+# Every stage samples greedily with a fixed seed so identical input gives
+# identical (and therefore cacheable) output
+SEED = 42
+# Uploads where WebRTC VAD finds speech in under 1% of 30 ms frames are treated
+# as silent and never reach OpenAI
+VAD_AGGRESSIVENESS = 2
+VAD_FRAME_MS = 30
+VAD_MIN_VOICED_RATIO = 0.01
+# MP4-family containers often store their index (moov atom) at the end, which
+# ffmpeg can only reach in a seekable file
+SEEKABLE_EXTENSIONS = {".m4a", ".mp4", ".mov"}
+TRANSCRIPTION_PROMPT = """
+                Qozoqcha so'zlar aralashgan o'zbekcha suhbatni yozing.
+                So'zlarni asl holida saqlang.
+                """
+
+# Speaker labels (with the whitespace before them) or runs of blank lines, so
+# formatting is a single pass over the text. The lookbehind anchors the leading
+# whitespace to the start of a run, keeping long runs linear
+_RE_SPEAKER = re.compile(r'(?<!\s)\s*\[?(?:speaker|suxbatdosh)\s*(\d+)\]?\s*:|\n{3,}', re.IGNORECASE)
+
+# Common Kazakh words with a fixed Uzbek equivalent, replaced locally so the
+# translation prompt doesn't have to carry the table on every request
+_KZ2UZ = {
+    "сіз": "сиз",
+    "біз": "биз",
+    "үчін": "учун",
+    "ғам": "ҳам",
+    "мұғым": "муҳим",
+    "қоңғырақ": "қўнғироқ",
+    "әгер": "агар",
+    "кәбір": "каби",
+    "мәқсат": "мақсад",
+    "қызмет": "хизмат",
+}
+
+
+def _build_kz2uz_automaton() -> ahocorasick.Automaton:
+    """
+    Aho-Corasick automaton over the Kazakh words, so lookup stays linear in the text however big the table gets
+    """
+    automaton = ahocorasick.Automaton()
+    for kazakh, uzbek in _KZ2UZ.items():
+        automaton.add_word(kazakh, (len(kazakh), uzbek))
+    automaton.make_automaton()
+    return automaton
+
+
+_KZ2UZ_AUTOMATON = _build_kz2uz_automaton()
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+def _local_kz2uz(text: str) -> str:
+    """
+    Replace whole-word occurrences of the fixed Kazakh-Uzbek pairs, keeping all caps or a leading capital
+    """
+    # Match case-insensitively unless lowercasing would shift character offsets
+    lowered = text.lower()
+    haystack = lowered if len(lowered) == len(text) else text
+
+    parts = []
+    last = 0
+    for end, (length, uzbek) in _KZ2UZ_AUTOMATON.iter_long(haystack):
+        start = end - length + 1
+        if (start > 0 and _is_word_char(text[start - 1])) or (end + 1 < len(text) and _is_word_char(text[end + 1])):
+            continue
+        parts.append(text[last:start])
+        word = text[start:end + 1]
+        if len(word) > 1 and word.isupper():
+            uzbek = uzbek.upper()
+        elif word[0].isupper():
+            uzbek = uzbek[0].upper() + uzbek[1:]
+        parts.append(uzbek)
+        last = end + 1
+    parts.append(text[last:])
+    return "".join(parts)
+
+
+async def chat_completion(system_prompt: str, content: str, temperature: float, model: str,
+                          response_format: Optional[Dict[str, str]] = None, seed: Optional[int] = SEED) -> str:
+    """
+    Run a chat completion through the LLM cache
+    """
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": content}
+    ]
+    extra = {"response_format": response_format} if response_format else {}
+
+    async def request():
+        return await get_client().chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            seed=seed,
+            **extra
+        )
+
+    async def compute() -> str:
+        response = await _limited(request)
+        return response.choices[0].message.content
+
+    key = LLMCache.cache_key(model, messages, temperature, response_format, seed)
+    return await llm_cache.get_or_compute(key, compute)
+
+
+async def chat_completion_stream(system_prompt: str, content: str, temperature: float,
+                                 model: str, seed: Optional[int] = SEED) -> AsyncIterator[str]:
+    """
+    Stream a chat completion token by token through the LLM cache
+    """
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": content}
+    ]
+
+    @_retry_rate_limited
+    async def open_stream():
+        return await get_client().chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            seed=seed,
+            stream=True
+        )
+
+    async def stream() -> AsyncIterator[str]:
+        # A streamed response keeps its slot until the last token has arrived
+        async with _openai_semaphore():
+            response = await open_stream()
+            async for chunk in response:
+                if chunk.choices:
+                    yield chunk.choices[0].delta.content or ""
+
+    key = LLMCache.cache_key(model, messages, temperature, seed=seed)
+    async for chunk in llm_cache.stream_or_compute(key, stream):
+        yield chunk
+
+
+class AudioProcessor:
+    @staticmethod
+    def format_speaker_labels(text: str, label: str = "Suxbatdosh") -> str:
+        """
+        Format speaker labels consistently
+        """
+        def replace(match: re.Match) -> str:
+            if match.group(1) is None:
+                return '\n\n'
+            # Every label except the very first starts after one blank line
+            prefix = '' if match.start() == 0 else '\n\n'
+            return f"{prefix}{label} {match.group(1)}:"
+
+        try:
+            return _RE_SPEAKER.sub(replace, text.strip())
+        except Exception as e:
+            logger.error(f"Formatlashda xatolik: {e}")
+            raise
+
+    @staticmethod
+    async def transcribe_audio(audio_bytes: bytes, filename: str,
+                               prompt: Optional[str] = TRANSCRIPTION_PROMPT) -> Dict[str, str]:
+        """
+        Transcribe in-memory audio with proper error handling
+        """
+        extra = {"prompt": prompt} if prompt else {}
+
+        async def request():
+            # The SDK takes the upload format from the file-like object's name. A fresh
+            # buffer per attempt, since a retried upload would find the old one exhausted
+            audio_file = io.BytesIO(audio_bytes)
+            audio_file.name = filename
+
+            return await get_client().audio.transcriptions.create(
+                model=WHISPER_MODEL,
+                file=audio_file,
+                response_format="verbose_json",
+                **extra
+            )
+
+        try:
+            response = await _limited(request)
+            return {"text": response.text}
+        except Exception as e:
+            logger.error(f"Yozib olishda xatolik: {e}")
+            raise
+
+    @staticmethod
+    async def _run_ffmpeg(source: str, audio_bytes: Optional[bytes]) -> Tuple[int, bytes, bytes]:
+        """
+        Transcode source to 16 kHz mono Opus, feeding audio_bytes on stdin when source is pipe:0
+        """
+        process = await asyncio.create_subprocess_exec(
+            "ffmpeg", "-loglevel", "error", "-i", source,
+            "-ac", "1", "-ar", "16000", "-c:a", "libopus", "-b:a", "24k", "-f", "ogg", "pipe:1",
+            stdin=asyncio.subprocess.PIPE if audio_bytes is not None else asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        stdout, stderr = await process.communicate(audio_bytes)
+        return process.returncode, stdout, stderr
+
+    @staticmethod
+    def _write_temp(audio_bytes: bytes, suffix: str) -> str:
+        """
+        Write the upload to a temporary file ffmpeg can seek in, returning its path
+        """
+        with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as f:
+            f.write(audio_bytes)
+            return f.name
+
+    @classmethod
+    async def _preprocess(cls, audio_bytes: bytes, filename: str) -> Tuple[bytes, str]:
+        """
+        Transcode audio to 16 kHz mono Opus, the format Whisper resamples to anyway
+        """
+        extension = os.path.splitext(filename)[1].lower()
+        try:
+            # Containers that need seeking (e.g. M4A with a trailing moov atom) can't be read
+            # from a pipe, so those go straight to a temp file and anything else retries with one
+            returncode, stdout, stderr = 1, b"", b""
+            if extension not in SEEKABLE_EXTENSIONS:
+                returncode, stdout, stderr = await cls._run_ffmpeg("pipe:0", audio_bytes)
+            if returncode != 0:
+                loop = asyncio.get_running_loop()
+                path = await loop.run_in_executor(None, cls._write_temp, audio_bytes, extension)
+                try:
+                    returncode, stdout, stderr = await cls._run_ffmpeg(path, None)
+                finally:
+                    os.remove(path)
+        except FileNotFoundError:
+            logger.warning("ffmpeg topilmadi, audio o'zgartirilmasdan yuboriladi")
+            return audio_bytes, filename
+
+        if returncode != 0:
+            logger.warning(f"Audio siqishda xatolik: {stderr.decode(errors='replace').strip()}")
+            return audio_bytes, filename
+
+        return stdout, os.path.splitext(filename)[0] + ".ogg"
+
+    @staticmethod
+    def _voiced_ratio(audio_bytes: bytes) -> Optional[float]:
+        """
+        Share of frames WebRTC VAD marks as speech, or None when the audio can't be checked
+        """
+        # The silence check is optional, without VAD every upload is transcribed
+        try:
+            import webrtcvad
+        except ImportError:
+            logger.warning("webrtcvad topilmadi, ovoz tekshirilmaydi")
+            return None
+
+        try:
+            samples, sample_rate = soundfile.read(io.BytesIO(audio_bytes), dtype="int16")
+        except RuntimeError as e:
+            logger.warning(f"Ovozni tekshirib bo'lmadi: {e}")
+            return None
+
+        # WebRTC VAD only accepts these rates, which the Opus transcode guarantees
+        if sample_rate not in (8000, 16000, 32000, 48000):
+            return None
+        if samples.ndim > 1:
+            samples = samples[:, 0]
+
+        pcm = samples.tobytes()
+        frame_size = sample_rate * VAD_FRAME_MS // 1000 * 2
+        frame_count = len(pcm) // frame_size
+        if frame_count == 0:
+            return 0.0
+
+        vad = webrtcvad.Vad(VAD_AGGRESSIVENESS)
+        voiced = sum(
+            vad.is_speech(pcm[i * frame_size:(i + 1) * frame_size], sample_rate) for i in range(frame_count)
+        )
+        return voiced / frame_count
+
+    @classmethod
+    async def transcribe_cached(cls, audio_bytes: bytes, filename: str,
+                                prompt: Optional[str] = TRANSCRIPTION_PROMPT) -> Dict[str, str]:
+        """
+        Transcribe uploaded audio, reusing the stored result for identical content
+        """
+        audio_hash = hashlib.blake2b(audio_bytes, digest_size=16).hexdigest()
+        key = (audio_hash, WHISPER_MODEL, prompt)
+        cached = whisper_cache.get(key)
+        if cached is not None:
+            logger.info("Yozib olish keshdan olindi")
+            return cached
+
+        upload_bytes, upload_name = await cls._preprocess(audio_bytes, filename)
+
+        # VAD skips are not cached: the check is local and cheap, and a stored skip
+        # would outlive any retuning of the VAD settings
+        voiced_ratio = await asyncio.get_running_loop().run_in_executor(None, cls._voiced_ratio, upload_bytes)
+        if voiced_ratio is not None and voiced_ratio < VAD_MIN_VOICED_RATIO:
+            logger.info("Audio faylda nutq topilmadi, yozib olish o'tkazib yuborildi")
+            return {"text": ""}
+
+        result = await cls.transcribe_audio(upload_bytes, upload_name, prompt)
+        whisper_cache.set(key, result)
+        return result
+
+    @staticmethod
+    async def identify_speakers(transcript: str) -> str:
+        """
+        Identify and label speakers in the transcript
+        """
+        try:
+            diarization_prompt = """
+            Bu qozoqcha-o'zbekcha aralash suhbat. Har bir so'zlovchining gaplarini belgilang.
+            Qoidalar:
+            1. Asl so'zlarni aynan saqlang
+            2. Har bir so'zlovchining gapini "Suxbatdosh N:" bilan boshlang
+            3. Turli so'zlovchilar orasida bo'sh qator qo'shing
+            4. Barcha asl imlo va tinish belgilarini saqlang
+            """
+
+            return await chat_completion(diarization_prompt, transcript, temperature=0, model=MODEL_DIARIZE)
+        except Exception as e:
+            logger.error(f"So'zlovchilarni aniqlashda xatolik: {e}")
+            raise
+
+    @staticmethod
+    async def convert_to_uzbek(text: str) -> str:
+        """
+        Convert mixed Kazakh-Uzbek text to pure Uzbek while preserving structure
+        """
+        try:
+            conversion_prompt = """
+            Qozoqcha-o'zbekcha aralash matnni toza o'zbek tiliga o'giring.
+            QATTIQ QOIDALAR:
+            1. So'zlar tartibini aynan saqlang
+            2. Har bir so'zni alohida o'zbek tiliga o'giring
+            3. Gap tuzilishini o'zgartirmang
+            4. To'g'ri o'zbek harflarini ishlating (ў, қ, ғ, ҳ)
+            """
+
+            # Fixed word pairs are handled locally, the model only sees what is left
+            return await chat_completion(conversion_prompt, _local_kz2uz(text), temperature=0, model=MODEL_TRANSLATE)
+        except Exception as e:
+            logger.error(f"O'zbek tiliga o'girishda xatolik: {e}")
+            raise
+
+    @staticmethod
+    async def create_summary(text: str) -> AsyncIterator[str]:
+        """
+        Stream a summary of the conversation in Uzbek
+        """
+        try:
+            summary_prompt = """
+            Quyidagi matnni tahlil qiling:
+
+            1. Asosiy mazmun (2-3 gap):
+               - Suhbatning asosiy mavzusi
+               - Muhim fikrlar
+
+            2. Qisqacha tahlil:
+               - Muhim nuqtalar (3-4 ta)
+               - Asosiy xulosalar
+
+            Tahlilni o'zbek tilida yozing.
+            """
+
+            async for chunk in chat_completion_stream(summary_prompt, text, temperature=0, model=MODEL_SUMMARY):
+                yield chunk
+        except Exception as e:
+            logger.error(f"Tahlil yaratishda xatolik: {e}")
+            raise
+
+    @staticmethod
+    async def process_combined(transcript: str) -> Dict[str, str]:
+        """
+        Identify speakers and convert to Uzbek in a single GPT request
+        """
+        try:
+            combined_prompt = """
+            Bu qozoqcha-o'zbekcha aralash suhbat. Ikki vazifani bajaring va natijani JSON
+            obyekt ko'rinishida qaytaring: {"diarized": "...", "uzbek": "..."}
+
+            "diarized" - har bir so'zlovchining gaplarini belgilang:
+            1. Asl so'zlarni aynan saqlang
+            2. Har bir so'zlovchining gapini "Suxbatdosh N:" bilan boshlang
+            3. Turli so'zlovchilar orasida bo'sh qator qo'shing
+            4. Barcha asl imlo va tinish belgilarini saqlang
+
+            "uzbek" - "diarized" matnini toza o'zbek tiliga o'giring:
+            1. So'zlar tartibini va "Suxbatdosh N:" belgilarini aynan saqlang
+            2. Har bir so'zni alohida o'zbek tiliga o'giring
+            3. Gap tuzilishini o'zgartirmang
+            4. To'g'ri o'zbek harflarini ishlating (ў, қ, ғ, ҳ)
+            """
+
+            content = await chat_completion(
+                combined_prompt,
+                transcript,
+                temperature=0,
+                model=MODEL_COMBINED,
+                response_format={"type": "json_object"}
+            )
+
+            data = json.loads(content)
+            if not isinstance(data, dict) or not all(
+                isinstance(data.get(key), str) for key in ("diarized", "uzbek")
+            ):
+                raise ValueError("Birlashgan javobda 'diarized' yoki 'uzbek' matni yo'q")
+            # The transcript itself can't be pre-substituted since "diarized" must keep
+            # the original words, so the fixed pairs are applied to the translation instead
+            return {"diarized": data["diarized"], "uzbek": _local_kz2uz(data["uzbek"])}
+        except Exception as e:
+            logger.error(f"Birlashgan so'rovda xatolik: {e}")
+            raise
+
+    @classmethod
+    async def diarize_and_translate(cls, transcript: str, progress: Dict[str, Any]) -> None:
+        """
+        Run diarization and translation as one fused request, falling back to separate requests
+        """
+        try:
+            combined = await cls.process_combined(transcript)
+        except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+            logger.warning("Birlashgan javobni o'qib bo'lmadi, bosqichlar alohida bajariladi")
+            diarized_text = await cls.identify_speakers(transcript)
+            progress["formatted_text"] = cls.format_speaker_labels(diarized_text)
+            progress["uzbek_text"] = await cls.convert_to_uzbek(progress["formatted_text"])
+            return
+
+        progress["formatted_text"] = cls.format_speaker_labels(combined["diarized"])
+        progress["uzbek_text"] = cls.format_speaker_labels(combined["uzbek"])
+
+    @classmethod
+    async def summarize(cls, transcript: str, progress: Dict[str, Any]) -> None:
+        """
+        Append the streamed summary to progress as tokens arrive
+        """
+        async for chunk in cls.create_summary(transcript):
+            progress["summary"] += chunk
+        progress["summary_done"] = True
+
+    @staticmethod
+    def new_progress() -> Dict[str, Any]:
+        """
+        Empty per-file progress record, filled in by process_batch as stages finish
+        """
+        return {
+            "transcript": None,
+            "formatted_text": None,
+            "uzbek_text": None,
+            "summary": "",
+            "summary_done": False,
+            "error": None
+        }
+
+    @classmethod
+    async def process_batch(cls, uploads: List[Tuple[bytes, str]], progress: List[Dict[str, Any]]) -> None:
+        """
+        Run the full pipeline for several uploads, publishing each stage into progress as it finishes
+        """
+        semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+        async def process_one(audio_bytes: bytes, filename: str, state: Dict[str, Any]) -> None:
+            try:
+                # Bound the number of in-flight Whisper uploads
+                async with semaphore:
+                    transcript_result = await cls.transcribe_cached(audio_bytes, filename)
+                state["transcript"] = transcript_result["text"]
+
+                # Nothing to label, translate or summarize in silent audio
+                if not state["transcript"].strip():
+                    state.update(formatted_text="", uzbek_text="", summary_done=True)
+                    return
+
+                # Both only need the raw transcript
+                await asyncio.gather(
+                    cls.diarize_and_translate(state["transcript"], state),
+                    cls.summarize(state["transcript"], state)
+                )
+            except Exception as e:
+                logger.error(f"Qayta ishlashda xatolik: {e}")
+                state["error"] = str(e)
+
+        await asyncio.gather(*[
+            process_one(audio_bytes, filename, state) for (audio_bytes, filename), state in zip(uploads, progress)
+        ])
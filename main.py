@@ -1,42 +1,20 @@
-import openai
-import os
 import streamlit as st
-from dotenv import load_dotenv
-from tempfile import NamedTemporaryFile
-import re
 
-# Load environment variables
-load_dotenv()
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-openai.api_key = OPENAI_API_KEY
+from audio_pipeline import MODEL_DIARIZE, MODEL_SUMMARY, AudioProcessor, chat_completion, run_async
 
 st.title("Audio Upload for Transcription and Analysis")
 st.write("Upload an audio file to transcribe and analyze the conversation with diarization and summary.")
 
 
-def format_speaker_labels(text):
-    """
-    Format speaker labels to ensure consistent capitalization and spacing
-    """
-    # Replace variations of speaker labels with consistent format
-    formatted_text = re.sub(r'\[?(?i)speaker\s*(\d+)\]?\s*:', r'Speaker \1:', text)
-
-    # Ensure there's a newline before each speaker change
-    formatted_text = re.sub(r'(?<!^)(?=Speaker \d+:)', r'\n\n', formatted_text)
-
-    return formatted_text
+async def process_audio_with_diarization(audio_bytes, filename):
+    # Step 1: Initial transcription with Whisper
+    initial_transcript = await AudioProcessor.transcribe_cached(audio_bytes, filename, prompt=None)
 
+    # Silent audio has nothing to diarize
+    if not initial_transcript["text"].strip():
+        return {"diarized_text": "", "raw_transcript": ""}
 
-def process_audio_with_diarization(audio_path):
-    # Step 1: Initial transcription with Whisper
-    with open(audio_path, "rb") as audio_file:
-        initial_transcript = openai.Audio.transcribe(
-            model="whisper-1",
-            file=audio_file,
-            response_format="verbose_json"
-        )
-
-    # Step 2: Use GPT-4 to identify speakers and segment the transcript
+    # Step 2: Use GPT to identify speakers and segment the transcript
     diarization_prompt = """
     Analyze this transcript and segment it by speaker. Format the output following these EXACT rules:
     1. Start each speaker segment with "Speaker N:" (where N is the speaker number)
@@ -56,18 +34,11 @@ def process_audio_with_diarization(audio_path):
     {transcript}
     """
 
-    diarization_response = openai.ChatCompletion.create(
-        model="gpt-4",
-        messages=[
-            {"role": "system", "content": diarization_prompt},
-            {"role": "user", "content": initial_transcript["text"]}
-        ],
-        temperature=0.3
-    )
+    diarized_text = await chat_completion(
+        diarization_prompt, initial_transcript["text"], temperature=0, model=MODEL_DIARIZE)
 
-    # Get the diarized text and format it
-    diarized_text = diarization_response["choices"][0]["message"]["content"]
-    formatted_diarized_text = format_speaker_labels(diarized_text)
+    # Format the diarized text
+    formatted_diarized_text = AudioProcessor.format_speaker_labels(diarized_text, label="Speaker")
 
     return {
         "diarized_text": formatted_diarized_text,
@@ -75,7 +46,7 @@ def process_audio_with_diarization(audio_path):
     }
 
 
-def analyze_conversation(diarized_text):
+async def analyze_conversation(diarized_text):
     analysis_prompt = """
     Analyze this conversation and provide:
     1. Summary: 2-3 sentences covering the main points
@@ -87,16 +58,7 @@ def analyze_conversation(diarized_text):
     {conversation}
     """
 
-    analysis_response = openai.ChatCompletion.create(
-        model="gpt-4",
-        messages=[
-            {"role": "system", "content": analysis_prompt},
-            {"role": "user", "content": diarized_text}
-        ],
-        temperature=0
-    )
-
-    return analysis_response["choices"][0]["message"]["content"]
+    return await chat_completion(analysis_prompt, diarized_text, temperature=0, model=MODEL_SUMMARY)
 
 
 # Audio file upload
@@ -104,44 +66,37 @@ audio_file = st.file_uploader("Upload an audio file", type=["mp3", "wav", "m4a"]
 
 if audio_file:
     with st.spinner("Processing audio file..."):
-        # Save uploaded file temporarily
-        with NamedTemporaryFile(delete=False, suffix=".mp3") as temp_file:
-            temp_file.write(audio_file.read())
-            temp_file_path = temp_file.name
-
         try:
             # Process audio with diarization
-            results = process_audio_with_diarization(temp_file_path)
-
-            # Display results in separate sections using markdown for better formatting
-            st.subheader("Diarized Transcript")
-            st.markdown(results["diarized_text"])
-
-            st.subheader("Analysis")
-            analysis = analyze_conversation(results["diarized_text"])
-            st.write(analysis)
-
-            # Add download buttons for transcripts
-            st.download_button(
-                label="Download Diarized Transcript",
-                data=results["diarized_text"],
-                file_name="diarized_transcript.txt"
-            )
-
-            st.download_button(
-                label="Download Raw Transcript",
-                data=results["raw_transcript"],
-                file_name="raw_transcript.txt"
-            )
+            results = run_async(process_audio_with_diarization(audio_file.getvalue(), audio_file.name)).result()
+
+            if not results["raw_transcript"]:
+                st.info("No speech was detected in the audio file.")
+            else:
+                # Display results in separate sections using markdown for better formatting
+                st.subheader("Diarized Transcript")
+                st.markdown(results["diarized_text"])
+
+                st.subheader("Analysis")
+                analysis = run_async(analyze_conversation(results["diarized_text"])).result()
+                st.write(analysis)
+
+                # Add download buttons for transcripts
+                st.download_button(
+                    label="Download Diarized Transcript",
+                    data=results["diarized_text"],
+                    file_name="diarized_transcript.txt"
+                )
+
+                st.download_button(
+                    label="Download Raw Transcript",
+                    data=results["raw_transcript"],
+                    file_name="raw_transcript.txt"
+                )
 
         except Exception as e:
             st.error(f"An error occurred: {str(e)}")
 
-        finally:
-            # Cleanup temporary file
-            if os.path.exists(temp_file_path):
-                os.unlink(temp_file_path)
-
 # Add some helpful information
 st.sidebar.markdown("""
 ### About This App